@@ -0,0 +1,242 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------------------
+# CONSTANTS
+# -------------------------------------------------------------
+POLLUTANTS = ['PM2.5', 'PM10', 'NO2', 'SO2', 'CO', 'O3']
+# AQI is screened as a series of its own: one faulty pollutant sensor
+# (e.g. a CO probe stuck at 0) must not discard an otherwise valid AQI
+MONITORED = POLLUTANTS + ['AQI']
+
+# Flag bits – a reading can carry several at once
+NEGATIVE = 1      # physically impossible value
+SPIKE = 2         # sudden jump relative to the previous reading
+OUTLIER = 4       # far from the running median in robust (MAD) units
+FLATLINE = 8      # stuck sensor: same value repeated too many times
+
+FLAG_NAMES = {NEGATIVE: 'negative', SPIKE: 'spike', OUTLIER: 'outlier', FLATLINE: 'flatline'}
+
+
+def describe_flags(flags):
+    """Turn a flag bitmask into a readable label, e.g. 'spike+outlier'."""
+    return "+".join(name for bit, name in FLAG_NAMES.items() if int(flags) & bit) or "ok"
+
+
+# -------------------------------------------------------------
+# STREAMING DETECTOR
+# -------------------------------------------------------------
+class AnomalyDetector:
+    """
+    Online sensor-fault detector keeping one set of streaming statistics
+    per (city, pollutant) series.
+
+    All state lives in flat NumPy arrays indexed by series slot, so a
+    single reading costs O(1) and a whole time step across every station
+    is one vectorized update (used for historical backfills).
+    """
+
+    def __init__(self, alpha=0.05, z_threshold=6.0, spike_ratio=10.0,
+                 flatline_len=6, warmup=14, min_level=1.0):
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.spike_ratio = spike_ratio
+        self.flatline_len = flatline_len
+        self.warmup = warmup
+        self.min_level = min_level
+
+        self.keys = {}
+        self.mean = np.zeros(0)
+        self.var = np.zeros(0)
+        self.median = np.zeros(0)
+        self.mad = np.zeros(0)
+        self.last = np.zeros(0)
+        self.flat_run = np.zeros(0, dtype=np.int64)
+        self.spike_count = np.zeros(0, dtype=np.int64)
+        self.count = np.zeros(0, dtype=np.int64)
+
+    # ------------------ slot management ------------------
+    def _slots(self, keys):
+        new = [k for k in dict.fromkeys(keys) if k not in self.keys]
+        if new:
+            start = len(self.keys)
+            self.keys.update({k: start + i for i, k in enumerate(new)})
+            grow = len(new)
+            self.mean = np.concatenate([self.mean, np.zeros(grow)])
+            self.var = np.concatenate([self.var, np.zeros(grow)])
+            self.median = np.concatenate([self.median, np.zeros(grow)])
+            self.mad = np.concatenate([self.mad, np.zeros(grow)])
+            self.last = np.concatenate([self.last, np.full(grow, np.nan)])
+            self.flat_run = np.concatenate([self.flat_run, np.zeros(grow, dtype=np.int64)])
+            self.spike_count = np.concatenate([self.spike_count, np.zeros(grow, dtype=np.int64)])
+            self.count = np.concatenate([self.count, np.zeros(grow, dtype=np.int64)])
+        return np.array([self.keys[k] for k in keys], dtype=np.int64)
+
+    # ------------------ core recurrence ------------------
+    def _step(self, idx, x):
+        """Score and absorb one reading for each slot in ``idx``; returns flag bits."""
+        flags = np.zeros(len(idx), dtype=np.int64)
+        valid = ~np.isnan(x)
+        if not valid.any():
+            return flags
+        idx, x = idx[valid], x[valid]
+
+        n = self.count[idx]
+        last = self.last[idx]
+        med = self.median[idx]
+        mad = self.mad[idx]
+        seen = n > 0
+        warm = n >= self.warmup
+
+        f = np.where(x < 0, NEGATIVE, 0)
+
+        # sudden jumps (either direction) against the previous reading
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.where(np.minimum(x, last) > 0, np.maximum(x, last) / np.minimum(x, last), 1.0)
+        jump = seen & (np.maximum(x, last) >= self.min_level) & (ratio >= self.spike_ratio)
+        f |= np.where(jump, SPIKE, 0)
+
+        # robust z-score against the running median / MAD
+        scale = np.maximum(1.4826 * mad, np.maximum(0.05 * np.abs(med), 1e-9))
+        robust_z = np.abs(x - med) / scale
+        f |= np.where(warm & (robust_z > self.z_threshold), OUTLIER, 0)
+
+        # stuck sensor
+        flat_run = np.where(seen & (x == last), self.flat_run[idx] + 1, 0)
+        f |= np.where(flat_run + 1 >= self.flatline_len, FLATLINE, 0)
+
+        # update state; outliers are winsorised so one bad value cannot drag the baseline
+        a = self.alpha
+        x_upd = np.where(warm, np.clip(x, med - self.z_threshold * scale, med + self.z_threshold * scale), x)
+        x_upd = np.maximum(x_upd, 0)
+        first = ~seen
+        delta = x_upd - self.mean[idx]
+        self.mean[idx] = np.where(first, x_upd, self.mean[idx] + a * delta)
+        self.var[idx] = np.where(first, 0.0, (1 - a) * (self.var[idx] + a * delta ** 2))
+        # stochastic median tracking: nudge towards x by a step proportional to the MAD
+        step = np.maximum(mad, 1e-3 * np.maximum(np.abs(med), 1.0))
+        self.median[idx] = np.where(first, x_upd, med + 2 * a * step * np.sign(x_upd - med))
+        self.mad[idx] = np.where(first, 0.0, (1 - a) * mad + a * np.abs(x_upd - med))
+        self.last[idx] = x
+        self.flat_run[idx] = flat_run
+        self.spike_count[idx] = np.where(jump, self.spike_count[idx] + 1, self.spike_count[idx])
+        self.count[idx] = n + 1
+
+        flags[valid] = f
+        return flags
+
+    # ------------------ public API ------------------
+    def update(self, city, pollutant, value):
+        """Score a single live reading in constant time; returns its flag bits."""
+        idx = self._slots([(city, pollutant)])
+        return int(self._step(idx, np.array([value], dtype=float))[0])
+
+    def update_many(self, keys, values):
+        """Score one reading for each of several series at once."""
+        idx = self._slots(list(keys))
+        return self._step(idx, np.asarray(values, dtype=float))
+
+    def stats(self):
+        """Current streaming statistics per series as a DataFrame."""
+        index = pd.MultiIndex.from_tuples(list(self.keys), names=['City', 'Pollutant'])
+        return pd.DataFrame({
+            'readings': self.count,
+            'ewma_mean': self.mean,
+            'ewma_std': np.sqrt(self.var),
+            'median': self.median,
+            'mad': self.mad,
+            'flat_run': self.flat_run,
+            'spikes': self.spike_count
+        }, index=index)
+
+
+# -------------------------------------------------------------
+# BATCH BACKFILL
+# -------------------------------------------------------------
+def detect_frame(df, pollutants=MONITORED, detector=None):
+    """
+    Replay a historical long-format frame through the detector.
+
+    Readings are pivoted to a (dates x series) matrix and every date is one
+    vectorized step across all stations. Returns a frame aligned with
+    ``df``'s (City, Date) pairs holding one flag column per pollutant.
+    """
+    detector = detector or AnomalyDetector()
+    pollutants = [p for p in pollutants if p in df.columns]
+    wide = (df.drop_duplicates(['City', 'Date'])
+              .pivot(index='Date', columns='City', values=pollutants)
+              .sort_index())
+    keys = [(city, p) for p, city in wide.columns]
+    idx = detector._slots(keys)
+
+    values = wide.to_numpy(dtype=float)
+    flags = np.zeros(values.shape, dtype=np.int64)
+    for t in range(values.shape[0]):
+        row = values[t]
+        present = ~np.isnan(row)
+        if present.any():
+            flags[t, present] = detector._step(idx[present], row[present])
+
+    flag_wide = pd.DataFrame(flags, index=wide.index, columns=wide.columns)
+    long = flag_wide.stack(level='City', future_stack=True)
+    long = long[long.index.isin(pd.MultiIndex.from_frame(df[['Date', 'City']]))]
+    return long.reorder_levels(['City', 'Date']).sort_index()
+
+
+def flagged_rows(flags, columns=None):
+    """Boolean Series per (City, Date): True when any of ``columns`` (default: all) was flagged."""
+    if columns is not None:
+        flags = flags[list(columns)]
+    return (flags != 0).any(axis=1)
+
+
+def mask_anomalies(df, flags):
+    """Copy of ``df`` with flagged pollutant readings replaced by NaN."""
+    out = df.set_index(['City', 'Date'])
+    aligned = flags.reindex(out.index).fillna(0).astype(np.int64)
+    for p in aligned.columns:
+        out[p] = out[p].mask(aligned[p] != 0)
+    return out.reset_index()
+
+
+# -------------------------------------------------------------
+# BENCHMARK
+# -------------------------------------------------------------
+def benchmark(path="data/air_quality.csv", pollutants=POLLUTANTS):
+    """Replay the shipped history reading-by-reading and as a batch backfill."""
+    from milestone3_dashboard import load_data
+
+    df = load_data(path).sort_values(['Date', 'City'])
+    pollutants = [p for p in pollutants if p in df.columns]
+    long = df.melt(id_vars=['City', 'Date'], value_vars=pollutants,
+                   var_name='Pollutant', value_name='Value').dropna(subset=['Value'])
+    long = long.sort_values('Date', kind='stable')
+
+    detector = AnomalyDetector()
+    start = time.perf_counter()
+    flagged = 0
+    for city, p, v in zip(long['City'], long['Pollutant'], long['Value']):
+        flagged += detector.update(city, p, v) != 0
+    online = time.perf_counter() - start
+
+    start = time.perf_counter()
+    flags = detect_frame(df, pollutants)
+    batch = time.perf_counter() - start
+
+    n = len(long)
+    print(f"Readings replayed     : {n:,} ({df['City'].nunique()} cities x {len(pollutants)} pollutants)")
+    print(f"Online update()       : {online:.2f}s  ({n / online:,.0f} readings/s, "
+          f"{1e6 * online / n:.1f} µs/reading)")
+    print(f"Vectorized backfill   : {batch:.2f}s  ({n / batch:,.0f} readings/s)")
+    print(f"Flagged (online/batch): {flagged:,} / {int((flags != 0).to_numpy().sum()):,}")
+    return {'readings': n, 'online_s': online, 'batch_s': batch}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sensor anomaly detection throughput benchmark.")
+    parser.add_argument("--data", default="data/air_quality.csv")
+    args = parser.parse_args()
+    benchmark(args.data)
@@ -0,0 +1,232 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:          # Windows
+    fcntl = None
+    import msvcrt
+
+# -------------------------------------------------------------
+# CONSTANTS
+# -------------------------------------------------------------
+DEFAULT_ROOT = os.environ.get("AIRAWARE_ARTIFACT_DIR", "artifacts")
+DEFAULT_MAX_MB = float(os.environ.get("AIRAWARE_ARTIFACT_MAX_MB", 1024))
+
+_MISSING = object()
+
+
+def _try_lock(fh):
+    try:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+@contextmanager
+def _file_lock(path, blocking=True):
+    """
+    Exclusive inter-process lock on ``path`` (flock on POSIX, msvcrt on
+    Windows). Yields whether the lock was acquired, which is always True
+    when ``blocking``.
+    """
+    with open(path, "a+b") as fh:
+        acquired = _try_lock(fh)
+        if blocking and not acquired and fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            acquired = True
+        while blocking and not acquired:
+            time.sleep(0.05)
+            acquired = _try_lock(fh)
+        try:
+            yield acquired
+        finally:
+            if acquired and fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+            elif acquired:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# -------------------------------------------------------------
+# ARTIFACT STORE
+# -------------------------------------------------------------
+class ArtifactStore:
+    """
+    Content-addressed pickle store on local disk or a shared volume.
+
+    Keys hash a namespace, the data version and any parameters, so a new
+    data file never serves stale results and several dashboard replicas
+    pointing at the same directory share each other's work. Writes go to a
+    temp file and are renamed into place, computation of a missing key is
+    serialised with a file lock, and the least recently used objects are
+    evicted once the store grows past ``max_bytes``.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, max_bytes=DEFAULT_MAX_MB * 1024 ** 2):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.objects = os.path.join(root, "objects")
+        self.locks = os.path.join(root, "locks")
+        os.makedirs(self.objects, exist_ok=True)
+        os.makedirs(self.locks, exist_ok=True)
+
+    # ------------------ keys and paths ------------------
+    @staticmethod
+    def key(namespace, version, params=None):
+        payload = json.dumps([namespace, version, params or {}], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.objects, key[:2], f"{key}.pkl")
+
+    def _lock_path(self, key):
+        # one lock file per key, so a compute() that itself calls get_or_compute
+        # never waits on a lock its own process already holds
+        return os.path.join(self.locks, key[:2], f"{key}.lock")
+
+    @staticmethod
+    def _remove_lock(path):
+        try:
+            os.remove(path)
+        except OSError:              # gone already, or still open elsewhere on Windows
+            pass
+
+    # ------------------ read / write ------------------
+    def get(self, key, default=None):
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return default
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # unreadable (e.g. written by an older code version) – treat as a miss
+            self._remove(path)
+            return default
+        try:
+            os.utime(path)              # mtime doubles as the LRU clock
+        except OSError:
+            pass
+        return value
+
+    def put(self, key, value):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            self._remove(tmp)
+            raise
+        self.evict()
+
+    def contains(self, namespace, version, params=None):
+        return os.path.exists(self.path(self.key(namespace, version, params)))
+
+    def get_or_compute(self, namespace, version, params, compute):
+        """
+        Return the stored artifact, computing and storing it on a miss.
+        Only one process computes a given key; the others wait on its lock
+        and then read the result.
+        """
+        key = self.key(namespace, version, params)
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        lock_path = self._lock_path(key)
+        os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+        with _file_lock(lock_path):
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                value = compute()
+                self.put(key, value)
+            # waiters re-check the object once they get the lock, so the file can go now
+            self._remove_lock(lock_path)
+        return value
+
+    # ------------------ housekeeping ------------------
+    def _entries(self):
+        for dirpath, _, files in os.walk(self.objects):
+            for name in files:
+                if name.endswith(".pkl"):
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield path, st.st_size, st.st_mtime
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        """Drop least recently used artifacts until the store is back under 90% of its budget."""
+        entries = list(self._entries())
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+        with _file_lock(os.path.join(self.locks, "evict.lock")):
+            removed = 0
+            for path, size, _ in sorted(entries, key=lambda e: e[2]):
+                if total <= 0.9 * self.max_bytes:
+                    break
+                self._remove(path)
+                self._remove_lock(self._lock_path(os.path.basename(path)[:-len('.pkl')]))
+                total -= size
+                removed += 1
+            return removed
+
+    def stats(self):
+        entries = list(self._entries())
+        return {
+            'root': os.path.abspath(self.root),
+            'artifacts': len(entries),
+            'size_mb': round(sum(size for _, size, _ in entries) / 1024 ** 2, 2),
+            'max_mb': round(self.max_bytes / 1024 ** 2, 2)
+        }
+
+    def clear(self):
+        for path, _, _ in list(self._entries()):
+            self._remove(path)
+            self._remove_lock(self._lock_path(os.path.basename(path)[:-len('.pkl')]))
+
+
+_STORE = None
+
+
+def get_store():
+    """Process-wide store configured from AIRAWARE_ARTIFACT_DIR / AIRAWARE_ARTIFACT_MAX_MB."""
+    global _STORE
+    if _STORE is None:
+        _STORE = ArtifactStore()
+    return _STORE
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the shared AirAware artifact store.")
+    parser.add_argument("--root", default=DEFAULT_ROOT)
+    parser.add_argument("--clear", action="store_true")
+    args = parser.parse_args()
+
+    store = ArtifactStore(args.root)
+    if args.clear:
+        store.clear()
+    print(store.stats())
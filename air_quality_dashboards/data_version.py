@@ -0,0 +1,46 @@
+import hashlib
+import os
+
+import pandas as pd
+
+
+# -------------------------------------------------------------
+# DATA FINGERPRINTS
+# -------------------------------------------------------------
+def frame_fingerprint(df, index=True):
+    """Stable content hash of a DataFrame (values, column names and, optionally, the index)."""
+    h = hashlib.sha1()
+    h.update(",".join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=index).values.tobytes())
+    return h.hexdigest()[:16]
+
+
+def city_fingerprints(df, city_col='City', date_col='Date'):
+    """
+    Fingerprint of every city's rows, used to detect which cities changed.
+    Rows are hashed in date order without the frame's index, so inserting,
+    reordering or re-indexing other cities' rows leaves a city's hash alone.
+    """
+    return {city: frame_fingerprint(group.sort_values(date_col, kind='stable').reset_index(drop=True), index=False)
+            for city, group in df.groupby(city_col, sort=True)}
+
+
+def data_version(df):
+    """Version string for a whole dataset; changes whenever any row changes."""
+    return frame_fingerprint(df)
+
+
+_FILE_VERSIONS = {}
+
+
+def file_version(path):
+    """Content hash of a data file, recomputed only when its size or mtime changes."""
+    st = os.stat(path)
+    stamp = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if stamp not in _FILE_VERSIONS:
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        _FILE_VERSIONS[stamp] = h.hexdigest()[:16]
+    return _FILE_VERSIONS[stamp]
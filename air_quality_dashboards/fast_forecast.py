@@ -0,0 +1,189 @@
+import argparse
+import itertools
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from gap_filling import impute
+
+# -------------------------------------------------------------
+# CONSTANTS
+# -------------------------------------------------------------
+SEASON = 7            # weekly seasonality of daily readings
+WINDOW = 365          # days of history used per city
+PHI = 0.98            # trend damping
+Z_95 = 1.96
+
+# smoothing parameter grid; every city is fitted against every combination at once
+ALPHAS = [0.1, 0.3, 0.5, 0.8]
+BETAS = [0.01, 0.1]
+GAMMAS = [0.05, 0.2]
+
+
+# -------------------------------------------------------------
+# MATRIX HELPERS
+# -------------------------------------------------------------
+def city_matrix(df, column, window=WINDOW):
+    """
+    Gap-filled (cities x days) matrix of the last ``window`` days per city,
+    right-aligned so every row ends on that city's latest reading. Cities
+    with shorter histories are left-padded with NaN; long gaps stay NaN and
+    are skipped by the recurrence.
+    """
+    filled, _ = impute(df, [column])
+    values = filled[column]
+    valid = values.notna()
+    # trim each city to its first..last reading, keeping interior gaps in place
+    inside = (valid.groupby(level='City').cummax().to_numpy()
+              & valid[::-1].groupby(level='City').cummax().to_numpy()[::-1])
+    tail = values[inside].groupby(level='City').tail(window)
+    cities = tail.index.get_level_values('City')
+    pos_from_end = tail.groupby(level='City').cumcount(ascending=False).to_numpy()
+
+    names = np.asarray(sorted(cities.unique()))
+    rows = np.searchsorted(names, cities.to_numpy())
+    matrix = np.full((len(names), window), np.nan)
+    matrix[rows, window - 1 - pos_from_end] = tail.to_numpy()
+
+    last_dates = tail.reset_index('Date')['Date'].groupby(level='City').max().reindex(names)
+    return names, matrix, last_dates
+
+
+# -------------------------------------------------------------
+# HOLT-WINTERS RECURRENCE (ALL SERIES AT ONCE)
+# -------------------------------------------------------------
+def holt_winters(Y, alpha, beta, gamma, phi=PHI, season=SEASON):
+    """
+    Additive damped Holt-Winters run over the rows of ``Y`` simultaneously.
+    ``alpha``/``beta``/``gamma`` are per-row arrays. NaNs (leading padding or
+    long gaps) leave a row's state unchanged. Returns final level, trend, seasonal state
+    and the one-step-ahead residual variance per row.
+    """
+    n, T = Y.shape
+    level = np.zeros(n)
+    trend = np.zeros(n)
+    seas = np.zeros((n, season))
+    started = np.zeros(n, dtype=bool)
+    sse = np.zeros(n)
+    count = np.zeros(n)
+    rows = np.arange(n)
+
+    for t in range(T):
+        y = Y[:, t]
+        k = t % season
+        obs = ~np.isnan(y)
+        fit = obs & started
+
+        s_k = seas[:, k]
+        err = y - (level + phi * trend + s_k)
+        sse += np.where(fit, err ** 2, 0)
+        count += fit
+
+        new_level = alpha * (y - s_k) + (1 - alpha) * (level + phi * trend)
+        new_trend = beta * (new_level - level) + (1 - beta) * phi * trend
+        new_seas = gamma * (y - new_level) + (1 - gamma) * s_k
+
+        level = np.where(fit, new_level, np.where(obs & ~started, y, level))
+        trend = np.where(fit, new_trend, trend)
+        seas[rows, k] = np.where(fit, new_seas, s_k)
+        started |= obs
+
+    sigma2 = sse / np.maximum(count - 1, 1)
+    # state is aligned so that the next step uses seasonal slot T % season
+    return level, trend, np.roll(seas, -(T % season), axis=1), sigma2
+
+
+def _project(level, trend, seas, sigma2, alpha, beta, gamma, periods, phi=PHI):
+    season = seas.shape[1]
+    h = np.arange(1, periods + 1)
+    damp = np.cumsum(phi ** h)
+    mean = level[:, None] + damp[None, :] * trend[:, None] + seas[:, (h - 1) % season]
+
+    # ETS(A,Ad,A) forecast variance: sigma^2 * (1 + sum_{j<h} c_j^2)
+    j = np.arange(1, periods)
+    c = (alpha[:, None] * (1 + beta[:, None] * np.cumsum(phi ** j)[None, :])
+         + (gamma * (1 - alpha))[:, None] * (j % season == 0)[None, :])
+    var = sigma2[:, None] * (1 + np.concatenate([np.zeros((len(level), 1)), np.cumsum(c ** 2, axis=1)], axis=1))
+    half = Z_95 * np.sqrt(var)
+    return mean, mean - half, mean + half
+
+
+def forecast_matrix(Y, periods=7):
+    """Fit every row against the full parameter grid in one pass and forecast with the best set."""
+    grid = np.array(list(itertools.product(ALPHAS, BETAS, GAMMAS)))
+    n, g = Y.shape[0], len(grid)
+    alpha, beta, gamma = (np.tile(grid[:, i], n) for i in range(3))
+
+    level, trend, seas, sigma2 = holt_winters(np.repeat(Y, g, axis=0), alpha, beta, gamma)
+    best = np.arange(n) * g + sigma2.reshape(n, g).argmin(axis=1)
+    return _project(level[best], trend[best], seas[best], sigma2[best],
+                    alpha[best], beta[best], gamma[best], periods)
+
+
+def forecast_all_cities(df, column='AQI', periods=7, window=WINDOW):
+    """
+    Fast mode: Holt-Winters forecasts with 95% intervals for every city at once.
+
+    Returns a frame indexed by (City, Date) with ``yhat``, ``yhat_lower`` and
+    ``yhat_upper`` – the same columns as the Prophet forecast.
+    """
+    names, Y, last_dates = city_matrix(df, column, window)
+    mean, lower, upper = forecast_matrix(Y, periods)
+    index = pd.MultiIndex.from_arrays([
+        np.repeat(names, periods),
+        (last_dates.to_numpy()[:, None] + pd.to_timedelta(np.arange(1, periods + 1), unit='D').to_numpy()).ravel()
+    ], names=['City', 'Date'])
+    return pd.DataFrame({
+        'yhat': mean.ravel(),
+        'yhat_lower': lower.ravel(),
+        'yhat_upper': upper.ravel()
+    }, index=index)
+
+
+# -------------------------------------------------------------
+# BENCHMARK
+# -------------------------------------------------------------
+def benchmark(path="data/air_quality.csv", periods=7):
+    """Hold out the last ``periods`` days per city; compare fast mode with Prophet."""
+    import logging
+    from milestone3_dashboard import forecast_aqi_prophet, load_data
+
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    df = load_data(path)
+    cutoff = df.groupby('City')['Date'].transform('max') - pd.Timedelta(days=periods)
+    train, test = df[df['Date'] <= cutoff], df[df['Date'] > cutoff]
+    actual = test.set_index(['City', 'Date'])['AQI']
+
+    start = time.perf_counter()
+    fast = forecast_all_cities(train, 'AQI', periods)
+    fast_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    prophet = []
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for city, g in train.groupby('City'):
+            fc = forecast_aqi_prophet(g.set_index('Date')[['AQI']], periods=periods)
+            prophet.append(fc.assign(City=city).rename_axis('Date').set_index('City', append=True)
+                           .reorder_levels(['City', 'Date']))
+    prophet = pd.concat(prophet)
+    prophet_s = time.perf_counter() - start
+
+    print(f"Cities: {df['City'].nunique()}, horizon: {periods} days")
+    print(f"{'Mode':<20}{'Latency (s)':>12}{'MAE':>10}{'RMSE':>10}{'95% cover':>11}")
+    for name, fc, secs in [("Fast (Holt-Winters)", fast, fast_s), ("Accurate (Prophet)", prophet, prophet_s)]:
+        joined = fc.join(actual, how='inner')
+        err = joined['yhat'] - joined['AQI']
+        cover = joined['AQI'].between(joined['yhat_lower'], joined['yhat_upper']).mean()
+        print(f"{name:<20}{secs:>12.2f}{err.abs().mean():>10.2f}"
+              f"{np.sqrt((err ** 2).mean()):>10.2f}{100 * cover:>10.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark fast Holt-Winters forecasts against Prophet.")
+    parser.add_argument("--data", default="data/air_quality.csv")
+    parser.add_argument("--periods", type=int, default=7)
+    args = parser.parse_args()
+    benchmark(args.data, args.periods)
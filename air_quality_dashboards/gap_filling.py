@@ -0,0 +1,130 @@
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from data_version import data_version
+
+# -------------------------------------------------------------
+# CONSTANTS
+# -------------------------------------------------------------
+LONG_GAP = 14        # days; shorter gaps are interpolated, longer ones are left as NaN
+
+# Gap mask codes
+OBSERVED = 0
+LINEAR = 1
+LONG = 2             # long or edge gap – left as NaN, too long to impute honestly
+
+_CACHE = OrderedDict()
+_CACHE_SIZE = 8
+
+
+# -------------------------------------------------------------
+# REGULAR DATE GRID
+# -------------------------------------------------------------
+def regularize(df, freq='D'):
+    """
+    Reindex a long (City, Date) frame onto a complete daily grid per city,
+    from each city's first to last reading. Missing days become NaN rows.
+    """
+    df = df.drop_duplicates(['City', 'Date'], keep='last')
+    span = df.groupby('City')['Date'].agg(['min', 'max'])
+    step = pd.Timedelta(1, unit=freq)
+    lengths = ((span['max'] - span['min']) // step + 1).to_numpy()
+
+    starts = np.repeat(span['min'].to_numpy(), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    grid = pd.MultiIndex.from_arrays(
+        [np.repeat(span.index.to_numpy(), lengths), starts + offsets * step],
+        names=['City', 'Date']
+    )
+    return df.set_index(['City', 'Date']).reindex(grid)
+
+
+# -------------------------------------------------------------
+# VECTORIZED INTERPOLATION
+# -------------------------------------------------------------
+def _interpolate(values, city):
+    """Linear interpolation inside each city using groupwise ffill/bfill of anchor points."""
+    pos = pd.Series(np.arange(len(values), dtype=float), index=values.index)
+    anchor = pos.where(values.notna())
+    prev_pos = anchor.groupby(city).ffill()
+    next_pos = anchor.groupby(city).bfill()
+    prev_val = values.groupby(city).ffill()
+    next_val = values.groupby(city).bfill()
+    weight = (pos - prev_pos) / (next_pos - prev_pos)
+    filled = prev_val + (next_val - prev_val) * weight.fillna(0)
+    return filled, prev_pos.isna() | next_pos.isna()
+
+
+def _fill_column(values, city, long_gap):
+    missing = values.isna()
+    mask = pd.Series(OBSERVED, index=values.index, dtype=np.int8)
+    if not missing.any():
+        return values, mask
+
+    # length of every NaN run, restarting at city boundaries
+    boundary = city != np.roll(city, 1)
+    run_id = np.cumsum((missing.to_numpy() != np.roll(missing.to_numpy(), 1)) | boundary)
+    run_len = missing.groupby(run_id).transform('sum')
+
+    # a weekday-profile fill was tried here and scored worse than straight
+    # lines on held-out gaps, even after detrending, so every gap is linear
+    linear, edge = _interpolate(values, city)
+    is_long = missing & (edge | (run_len > long_gap))
+    is_linear = missing & ~is_long
+
+    filled = values.copy()
+    filled[is_linear] = linear[is_linear]
+
+    mask[is_linear] = LINEAR
+    mask[is_long] = LONG
+    return filled, mask
+
+
+def fill_gaps(df, columns, long_gap=LONG_GAP):
+    """
+    Put every city on a regular daily grid and impute the given columns.
+
+    Gaps up to ``long_gap`` days are interpolated linearly; anything
+    longer (or touching either end of a city's history) stays NaN and is
+    marked ``LONG`` in the returned mask. A column with no readings at all
+    for a city stays NaN. All work is done with groupwise vectorized
+    operations; no per-city Python loop.
+
+    Returns ``(filled, mask)`` indexed by (City, Date).
+    """
+    grid = regularize(df)
+    city = grid.index.get_level_values('City').to_numpy()
+
+    filled = grid.copy()
+    mask = pd.DataFrame(index=grid.index)
+    for col in columns:
+        values = pd.to_numeric(grid[col], errors='coerce')
+        filled[col], mask[col] = _fill_column(values, city, long_gap)
+    return filled, mask
+
+
+def impute(df, columns, long_gap=LONG_GAP):
+    """Cached ``fill_gaps``; results are reused until the underlying data changes."""
+    key = (data_version(df), tuple(columns), long_gap)
+    if key in _CACHE:
+        _CACHE.move_to_end(key)
+    else:
+        _CACHE[key] = fill_gaps(df, columns, long_gap)
+        if len(_CACHE) > _CACHE_SIZE:
+            _CACHE.popitem(last=False)
+    filled, mask = _CACHE[key]
+    return filled.copy(), mask.copy()
+
+
+def city_series(df, city, column, long_gap=LONG_GAP):
+    """
+    Daily series for one city, ready for ARIMA / Prophet, plus its gap mask.
+    The series runs from the first to the last reading of ``column``; long
+    gaps inside it stay NaN, which both models treat as missing.
+    """
+    filled, mask = impute(df, [column], long_gap)
+    series = filled.loc[city, column]
+    span = slice(series.first_valid_index(), series.last_valid_index())
+    return series.loc[span].asfreq('D'), mask.loc[city, column].loc[span].asfreq('D')
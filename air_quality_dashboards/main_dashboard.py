@@ -4,6 +4,7 @@ import milestone1_dashboard as m1
 import milestone2_dashboard as m2
 import milestone3_dashboard as m3
 import milestone4_dashboard as m4
+from precompute_scheduler import start_background_scheduler
 
 # -------------------------------------------------------------
 # PAGE CONFIG
@@ -14,6 +15,15 @@ st.set_page_config(
     layout="wide"
 )
 
+# -------------------------------------------------------------
+# BACKGROUND PRECOMPUTE (one refresher thread per server process)
+# -------------------------------------------------------------
+@st.cache_resource
+def precompute_scheduler():
+    return start_background_scheduler()
+
+precompute_scheduler()
+
 # -------------------------------------------------------------
 # DARK THEME STYLING
 # -------------------------------------------------------------
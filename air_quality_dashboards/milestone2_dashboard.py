@@ -3,12 +3,12 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
+from artifact_store import get_store
 
 # --------------------------
 # Load or simulate data
 # --------------------------
-@st.cache_data
-def load_forecast_data():
+def simulate_forecast_data():
     pollutants = ['PM2.5', 'PM10', 'NO', 'NO2', 'NOx', 'NH3',
                   'CO', 'SO2', 'O3', 'Benzene', 'Toluene', 'Xylene', 'AQI']
     models = ['ARIMA', 'Prophet', 'XGBoost']
@@ -44,6 +44,12 @@ def load_forecast_data():
     return df_rmse, df_mae, df_forecast, acc
 
 
+@st.cache_data
+def load_forecast_data():
+    # simulated with a fixed seed, so the seed is the whole data version
+    return get_store().get_or_compute("m2.forecast_data.v1", "simulated-seed-42", None, simulate_forecast_data)
+
+
 # --------------------------
 # Dashboard Layout
 # --------------------------
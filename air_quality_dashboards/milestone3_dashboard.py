@@ -2,7 +2,11 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-from prophet import Prophet
+from anomaly_detection import describe_flags, detect_frame, flagged_rows
+from artifact_store import get_store
+from data_version import file_version
+from precompute_scheduler import record_access
+from fast_forecast import forecast_all_cities
 
 # -------------------------------------------------------------
 # CONSTANTS
@@ -27,12 +31,14 @@ CATEGORY_COLORS = {
 
 WHO_LIMITS = {'PM2.5': 15, 'PM10': 45, 'O3': 100}
 
+FORECAST_MODES = ["Fast (Holt-Winters)", "Accurate (Prophet)"]
+
+DATA_PATH = "data/air_quality.csv"
+
 # -------------------------------------------------------------
 # LOAD DATA
 # -------------------------------------------------------------
-@st.cache_data
-@st.cache_data
-def load_data(path="data/air_quality.csv"):
+def read_clean_data(path=DATA_PATH):
     df = pd.read_csv(path)
     df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
     df = df.sort_values('Date')
@@ -54,10 +60,33 @@ def load_data(path="data/air_quality.csv"):
 
     return df
 
+# st.cache_data is the in-process layer; the artifact store is shared by every
+# replica on the same volume, so a fresh process starts warm. Both are keyed on
+# the data file's version, so a new file is picked up by every layer at once.
+@st.cache_data
+def _load_data(path, version):
+    return get_store().get_or_compute(
+        "m3.clean_frame.v1", version, None, lambda: read_clean_data(path))
+
+def load_data(path=DATA_PATH, version=None):
+    return _load_data(path, version or file_version(path))
+
+@st.cache_data
+def _load_sensor_flags(path, version):
+    # per-(City, Date) flag bits for each pollutant; 0 means the reading looks healthy
+    return get_store().get_or_compute(
+        "sensor_flags.v2", version, None, lambda: detect_frame(_load_data(path, version)))
+
+def load_sensor_flags(path=DATA_PATH, version=None):
+    return _load_sensor_flags(path, version or file_version(path))
+
 # -------------------------------------------------------------
 # FORECAST FUNCTION (AQI)
 # -------------------------------------------------------------
 def forecast_aqi_prophet(series, periods=7):
+    # imported lazily so the fast mode never pays for Prophet / Stan start-up
+    from prophet import Prophet
+
     df = series.reset_index().rename(columns={'Date': 'ds', 'AQI': 'y'})
     m = Prophet()
     m.fit(df)
@@ -65,6 +94,35 @@ def forecast_aqi_prophet(series, periods=7):
     fcst = m.predict(future).set_index('ds')
     return fcst[['yhat', 'yhat_lower', 'yhat_upper']].iloc[-periods:]
 
+def _fast_forecast(periods, version):
+    # one Holt-Winters pass over every city; flagged AQI readings are imputed, not fitted
+    df = load_data(version=version).set_index(['City', 'Date'])
+    suspect = flagged_rows(load_sensor_flags(version=version), ['AQI']).reindex(df.index, fill_value=False)
+    df['AQI'] = df['AQI'].mask(suspect.to_numpy())
+    return forecast_all_cities(df.reset_index(), 'AQI', periods)
+
+@st.cache_data
+def _load_fast_forecast(periods, version):
+    return get_store().get_or_compute(
+        "fast_forecast.v3", version, {'column': 'AQI', 'periods': periods},
+        lambda: _fast_forecast(periods, version))
+
+def load_fast_forecast(periods=7, version=None):
+    return _load_fast_forecast(periods, version or file_version(DATA_PATH))
+
+def city_prophet_forecast(city, periods=7, version=None):
+    version = version or file_version(DATA_PATH)
+
+    def fit():
+        df_city = load_data(version=version).query("City == @city").set_index('Date').sort_index()
+        city_flags = load_sensor_flags(version=version).loc[city].reindex(df_city.index, fill_value=0)
+        # AQI readings flagged as faulty are left out of the fit
+        series = df_city.loc[~flagged_rows(city_flags, ['AQI']), ['AQI']]
+        return forecast_aqi_prophet(series, periods=periods)
+
+    return get_store().get_or_compute(
+        "prophet_forecast.v1", version, {'city': city, 'periods': periods}, fit)
+
 # -------------------------------------------------------------
 # AQI CATEGORY FUNCTION
 # -------------------------------------------------------------
@@ -107,7 +165,9 @@ def show_dashboard():
     st.markdown("<div class='main-title'>Air Quality Alert System</div>", unsafe_allow_html=True)
     st.markdown("<div class='subtitle'>Milestone 3: Working Application (Weeks 5–6)</div>", unsafe_allow_html=True)
 
-    df = load_data()
+    version = file_version(DATA_PATH)
+    df = load_data(version=version)
+    flags = load_sensor_flags(version=version)
 
     # ------------------ Sidebar / Inputs ------------------
     col1, col2 = st.columns([2, 1])
@@ -120,11 +180,14 @@ def show_dashboard():
     if df_city.empty:
         st.warning("No data available for this city.")
         return
+    city_flags = flags.loc[city].reindex(df_city.index, fill_value=0)
+    record_access("Milestone 3", city, "AQI", st.session_state)
 
     latest = df_city.iloc[-1]
     aqi_val = float(latest.get('AQI', np.nan))
     aqi_val = 0 if np.isnan(aqi_val) else aqi_val
     aqi_cat = get_aqi_category(aqi_val)
+    aqi_flag = city_flags.iloc[-1].get('AQI', 0)
 
     # ---------------------------------------------------------
     # ROW 1 – Current AQI + 7-Day AQI Forecast
@@ -138,10 +201,13 @@ def show_dashboard():
             mode="gauge+number",
             value=aqi_val,
             number={'font': {'size': 36}},
-            title={'text': f"{city}<br><b>{aqi_cat}</b>", 'font': {'size': 20}},
+            title={'text': f"{city}<br><b>{aqi_cat}</b>"
+                           + (f"<br><span style='font-size:14px'>🛠️ flagged: {describe_flags(aqi_flag)}</span>"
+                              if aqi_flag else ""),
+                   'font': {'size': 20}},
             gauge={
                 'axis': {'range': [0, 500]},
-                'bar': {'color': AQI_COLOR.get(aqi_cat, '#95A5A6')},
+                'bar': {'color': '#95A5A6' if aqi_flag else AQI_COLOR.get(aqi_cat, '#95A5A6')},
                 'steps': [
                     {'range': [0, 50], 'color': CATEGORY_COLORS['Good']},
                     {'range': [51, 100], 'color': CATEGORY_COLORS['Satisfactory']},
@@ -158,8 +224,12 @@ def show_dashboard():
     # --- AQI Forecast ---
     with col2:
         st.markdown("### 🔮 7-Day AQI Forecast")
+        forecast_mode = st.radio("Forecast mode", FORECAST_MODES, horizontal=True)
         try:
-            fcst = forecast_aqi_prophet(df_city[['AQI']], periods=7)
+            if forecast_mode == FORECAST_MODES[0]:
+                fcst = load_fast_forecast(periods=7, version=version).loc[city].copy()
+            else:
+                fcst = city_prophet_forecast(city, periods=7, version=version)
             fcst['category'] = fcst['yhat'].apply(get_aqi_category)
             cols = st.columns(7)
             for i, d in enumerate(fcst.index.date):
@@ -191,10 +261,19 @@ def show_dashboard():
             fig2 = go.Figure()
             for p in pollutants:
                 if p in recent.columns:
+                    # readings flagged as sensor faults are drawn apart from the trend line
+                    flagged = city_flags.loc[recent.index, p] != 0
                     fig2.add_trace(go.Scatter(
-                        x=recent.index, y=recent[p],
+                        x=recent.index, y=recent[p].mask(flagged),
                         mode='lines+markers', name=p
                     ))
+                    if flagged.any():
+                        fig2.add_trace(go.Scatter(
+                            x=recent.index[flagged], y=recent[p][flagged],
+                            mode='markers', name=f'{p} (flagged)',
+                            marker=dict(symbol='x', size=10, color='grey'),
+                            text=[describe_flags(f) for f in city_flags.loc[recent.index[flagged], p]]
+                        ))
                     if p in WHO_LIMITS:
                         fig2.add_trace(go.Scatter(
                             x=[recent.index.min(), recent.index.max()],
@@ -217,7 +296,9 @@ def show_dashboard():
         alerts = []
 
         # AQI level alerts
-        if aqi_val > 400:
+        if aqi_flag:
+            alerts.append(f"🛠️ AQI reading flagged as {describe_flags(aqi_flag)} – excluded from alerts.")
+        elif aqi_val > 400:
             alerts.append("🚨 **Severe AQI** – Serious health impact for all groups.")
         elif aqi_val > 300:
             alerts.append("☠️ **Very Poor Air** – Respiratory illness on prolonged exposure.")
@@ -237,7 +318,10 @@ def show_dashboard():
         # Pollutant WHO limit alerts
         for p, lim in WHO_LIMITS.items():
             val = df_city.iloc[-1].get(p, np.nan)
-            if pd.notna(val) and val > lim:
+            flag = city_flags.iloc[-1].get(p, 0)
+            if flag:
+                alerts.append(f"🛠️ {p} reading flagged as {describe_flags(flag)} – excluded from alerts.")
+            elif pd.notna(val) and val > lim:
                 alerts.append(f"⚠️ {p}: {val:.1f} µg/m³ exceeds WHO limit ({lim}).")
 
         # Display alerts
@@ -5,16 +5,38 @@ import plotly.graph_objects as go
 import plotly.express as px
 from statsmodels.tsa.arima.model import ARIMA
 from datetime import timedelta
+from anomaly_detection import mask_anomalies
+from artifact_store import get_store
+from data_version import file_version
+from fast_forecast import forecast_all_cities
+from gap_filling import LINEAR, LONG, OBSERVED, city_series
+from milestone3_dashboard import load_sensor_flags
+from precompute_scheduler import record_access, scheduler_status
+from report_generator import generate_reports, load_manifest
+from scenario_simulator import FEATURES, CompiledForest, best_scenarios, load_inputs, load_model, simulate
 
-def show_dashboard():
-    # ------------------ Title ------------------
-    st.markdown("""
-    <h2 style="color:#2e7d32;">📊 Air Quality Forecast Dashboard</h2>
-    <p style="color:gray; margin-top:-10px;">Milestone 4: Working Application (Weeks 7–8)</p>
-    """, unsafe_allow_html=True)
+DATA_PATH = "data/air_quality.csv"
+HORIZON_DAYS = {"24 Hours": 1, "3 Days": 3, "7 Days": 7}
 
-    # ------------------ Load and Clean Data ------------------
-    df = pd.read_csv("data/air_quality.csv")
+@st.cache_resource
+def load_scenario_engine():
+    df, scaler = load_inputs()
+    return df, scaler, CompiledForest(load_model())
+
+def forecast_arima(series, steps):
+    try:
+        model = ARIMA(series, order=(2, 1, 2))
+        model_fit = model.fit()
+    except:
+        model = ARIMA(series, order=(1, 1, 1))
+        model_fit = model.fit()
+
+    forecast = model_fit.get_forecast(steps=steps)
+    return forecast.predicted_mean, forecast.conf_int()
+
+def load_station_data(path=DATA_PATH, version=None):
+    version = version or file_version(path)
+    df = pd.read_csv(path)
 
     # Ensure correct data types
     df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
@@ -26,12 +48,45 @@ def show_dashboard():
 
     df = df.sort_values('Date')
 
+    # Drop readings flagged as sensor faults so they never reach the forecast
+    return mask_anomalies(df, load_sensor_flags(path, version))
+
+def station_forecast(df, city, pollutant, steps, model_name="ARIMA", version=None):
+    # results live in the shared artifact store, keyed by data version and view;
+    # pass the version ``df`` was loaded at so results never land under a newer key
+    data_ver = version or file_version(DATA_PATH)
+    if model_name == "ARIMA":
+        # regular daily series: ARIMA assumes a fixed frequency; long gaps stay NaN
+        series, _ = city_series(df, city, pollutant)
+        return get_store().get_or_compute(
+            "arima_forecast.v3", data_ver, {'city': city, 'pollutant': pollutant, 'steps': steps},
+            lambda: forecast_arima(series, steps))
+
+    fast = get_store().get_or_compute(
+        "fast_forecast_pollutant.v3", data_ver, {'pollutant': pollutant, 'steps': steps},
+        lambda: forecast_all_cities(df, pollutant, steps)).loc[city]
+    return fast['yhat'], fast[['yhat_lower', 'yhat_upper']]
+
+def show_dashboard():
+    # ------------------ Title ------------------
+    st.markdown("""
+    <h2 style="color:#2e7d32;">📊 Air Quality Forecast Dashboard</h2>
+    <p style="color:gray; margin-top:-10px;">Milestone 4: Working Application (Weeks 7–8)</p>
+    """, unsafe_allow_html=True)
+
+    # ------------------ Load and Clean Data ------------------
+    version = file_version(DATA_PATH)
+    df = load_station_data(version=version)
+
     # ------------------ Sidebar ------------------
     st.sidebar.header("🧭 Forecast Controls")
 
     city = st.sidebar.selectbox("Monitoring Station", sorted(df['City'].unique()))
     pollutant = st.sidebar.selectbox("Pollutant", ['PM2.5', 'PM10', 'NO2', 'O3'])
     forecast_horizon = st.sidebar.selectbox("Forecast Horizon", ["24 Hours", "3 Days", "7 Days"])
+    forecast_mode = st.sidebar.radio("Forecast Mode", ["Accurate (ARIMA)", "Fast (Holt-Winters)"])
+    model_name = "ARIMA" if forecast_mode.startswith("Accurate") else "Holt-Winters"
+    record_access("Milestone 4", city, pollutant, st.session_state)
 
     st.sidebar.markdown("---")
     st.sidebar.markdown("📆 **Data Span:**")
@@ -85,29 +140,24 @@ def show_dashboard():
         st.write(f"**Current AQI:** {last_aqi:.2f}")
         st.write(f"**Category (CPCB Standard):** {aqi_bucket}")
 
-    # --- ARIMA Forecast Chart ---
+    # --- Forecast Chart ---
     with col2:
-        st.subheader(f"📈 {pollutant} Forecast (ARIMA)")
-        data = df_city[['Date', pollutant]].set_index('Date')
-        forecast_days = {"24 Hours": 1, "3 Days": 3, "7 Days": 7}[forecast_horizon]
-
-        try:
-            model = ARIMA(data[pollutant], order=(2, 1, 2))
-            model_fit = model.fit()
-        except:
-            model = ARIMA(data[pollutant], order=(1, 1, 1))
-            model_fit = model.fit()
-
-        forecast = model_fit.get_forecast(steps=forecast_days)
-        pred = forecast.predicted_mean
-        ci = forecast.conf_int()
+        st.subheader(f"📈 {pollutant} Forecast ({model_name})")
+        data, city_mask = city_series(df, city, pollutant)
+        forecast_days = HORIZON_DAYS[forecast_horizon]
+        pred, ci = station_forecast(df, city, pollutant, forecast_days, model_name, version)
         future_dates = pd.date_range(data.index[-1] + timedelta(days=1), periods=forecast_days)
 
+        # measured and imputed days are drawn apart; long gaps are left blank
         fig_forecast = go.Figure()
         fig_forecast.add_trace(go.Scatter(
-            x=data.index, y=data[pollutant],
+            x=data.index, y=data.where(city_mask == OBSERVED),
             mode='lines+markers', name='Historical'
         ))
+        fig_forecast.add_trace(go.Scatter(
+            x=data.index, y=data.where(city_mask == LINEAR),
+            mode='markers', name='Imputed', marker=dict(symbol='circle-open', color='grey')
+        ))
         fig_forecast.add_trace(go.Scatter(
             x=future_dates, y=pred,
             mode='lines+markers', name='Forecast', line=dict(dash='dot')
@@ -121,11 +171,15 @@ def show_dashboard():
             fill='tonexty', mode='lines', line_color='lightgrey', name='Upper CI'
         ))
         fig_forecast.update_layout(
-            title=f"{pollutant} Forecast using ARIMA",
+            title=f"{pollutant} Forecast using {model_name}",
             xaxis_title="Date",
             yaxis_title=f"{pollutant} (µg/m³)"
         )
         st.plotly_chart(fig_forecast, use_container_width=True)
+        st.caption(
+            f"Imputed days – interpolated: {int((city_mask == LINEAR).sum())}, "
+            f"long (left blank): {int((city_mask == LONG).sum())}"
+        )
 
     st.divider()
 
@@ -150,3 +204,70 @@ def show_dashboard():
         st.warning("⚠️ Moderate air quality expected\n\n📅 Tomorrow, 10:00 AM")
 
     st.info("📊 ARIMA model updated successfully\n\n🕓 Yesterday, 11:30 PM")
+
+    st.divider()
+
+    # ------------------ What-if Scenarios ------------------
+    st.subheader("🧪 What-if Emission Scenarios")
+    sc_col1, sc_col2 = st.columns(2)
+    with sc_col1:
+        scen_pollutants = st.multiselect("Pollutants to adjust", FEATURES, default=['PM10'])
+        change_range = st.slider("Change range (%)", -50, 50, (-30, 0), step=5)
+    with sc_col2:
+        scen_cities = st.multiselect("Cities", sorted(df['City'].unique()), default=[city])
+        scen_levels = st.slider("Levels per pollutant", 2, 6, 4)
+
+    if st.button("Run scenarios") and scen_pollutants and scen_cities:
+        scen_df, scaler, forest = load_scenario_engine()
+        levels = np.linspace(change_range[0], change_range[1], scen_levels) / 100
+        end = scen_df['Date'].max()
+        with st.spinner("Scoring scenarios over the last year..."):
+            results = simulate(scen_df, scaler, {p: levels for p in scen_pollutants},
+                               cities=scen_cities, start=end - timedelta(days=365), end=end, forest=forest)
+        top = best_scenarios(results, 10)
+        change_cols = [f"{p} change (%)" for p in scen_pollutants]
+        n_scenarios = results.index.get_level_values('Scenario').nunique()
+        st.write(f"**{n_scenarios:,} scenarios** "
+                 f"scored for {', '.join(scen_cities)} – largest average AQI reductions:")
+        st.dataframe(top[change_cols + ['AQI', 'AQI Change', 'Improved (%)', 'Worsened (%)']],
+                     use_container_width=True)
+
+        best = results.xs(top.index[0], level='Scenario')
+        cat_cols = [c for c in results.columns if c.endswith('(%)') and 'change' not in c
+                    and c not in ('Improved (%)', 'Worsened (%)')]
+        fig_cat = px.bar(best[cat_cols].reset_index().melt(id_vars='City', var_name='Category', value_name='Share (%)'),
+                         x='City', y='Share (%)', color='Category', title="AQI Category Mix – Best Scenario")
+        st.plotly_chart(fig_cat, use_container_width=True)
+
+    st.divider()
+
+    # ------------------ Admin Reports ------------------
+    st.subheader("🗂️ Admin Reports")
+    report_format = st.radio("Export format", ["csv", "parquet"], horizontal=True)
+    if st.button("Generate reports for all stations"):
+        with st.spinner("Generating station reports..."):
+            updated = generate_reports(out_dir="reports", fmt=report_format)
+        st.success(f"✅ Regenerated {len(updated)} station report(s); unchanged stations were skipped.")
+
+    manifest = load_manifest("reports")
+    if manifest:
+        st.dataframe(pd.DataFrame([
+            {"Station": c, "Format": e['format'], "Last Generated": e['generated_at'],
+             "HTML Report": e['files'][-1]}
+            for c, e in sorted(manifest.items())
+        ]), use_container_width=True, hide_index=True)
+
+    # ------------------ Precompute Status ------------------
+    st.subheader("⏱️ Precompute Status")
+    status = scheduler_status()
+    if status['data_version'] is None:
+        st.info("No background refresh has run yet; views are computed on first access.")
+    else:
+        s_col1, s_col2, s_col3, s_col4 = st.columns(4)
+        s_col1.metric("Data Version", status['data_version'][:8], "current" if status['up_to_date'] else "refreshing")
+        s_col2.metric("Warm Views", f"{status['views_warm']} / {status['views_tracked']}")
+        s_col3.metric("Median Lag (s)", status['lag_p50_seconds'] if status['lag_p50_seconds'] is not None else "–")
+        s_col4.metric("Max Lag (s)", status['lag_max_seconds'] if status['lag_max_seconds'] is not None else "–")
+        if status['views']:
+            st.dataframe(pd.DataFrame(status['views'])[['page', 'city', 'pollutant', 'hits', 'state', 'lag_seconds']],
+                         use_container_width=True, hide_index=True)
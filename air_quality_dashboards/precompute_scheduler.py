@@ -0,0 +1,283 @@
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from artifact_store import _file_lock, get_store
+from data_version import file_version
+
+# -------------------------------------------------------------
+# CONSTANTS
+# -------------------------------------------------------------
+DATA_PATH = "data/air_quality.csv"
+HALF_LIFE_DAYS = 7            # popularity decays so yesterday's hot city can cool down
+CPU_BUDGET = float(os.environ.get("AIRAWARE_PRECOMPUTE_CPU_SECONDS", 120))
+DUTY_CYCLE = float(os.environ.get("AIRAWARE_PRECOMPUTE_DUTY_CYCLE", 0.5))
+POLL_INTERVAL = 60            # seconds between data-version checks
+
+STATUS_FILE = "scheduler_status.json"
+USAGE_DB = "usage.sqlite"
+
+
+# -------------------------------------------------------------
+# USAGE TRACKING
+# -------------------------------------------------------------
+class UsageTracker:
+    """
+    Per-(page, city, pollutant) access counts in a small SQLite file next
+    to the artifact store, so every replica contributes to one ranking.
+    Each view keeps an exponentially decayed score updated in O(1).
+    """
+
+    def __init__(self, path=None, half_life_days=HALF_LIFE_DAYS):
+        self.path = path or os.path.join(get_store().root, USAGE_DB)
+        self.half_life = half_life_days * 86400
+        with self._connect() as con:
+            con.execute("""CREATE TABLE IF NOT EXISTS views (
+                page TEXT, city TEXT, pollutant TEXT,
+                score REAL, hits INTEGER, updated REAL,
+                PRIMARY KEY (page, city, pollutant))""")
+
+    def _connect(self):
+        con = sqlite3.connect(self.path, timeout=5)
+        con.create_function("decay", 1, self._decay, deterministic=True)
+        return con
+
+    def _decay(self, age):
+        return 0.5 ** (age / self.half_life)
+
+    def record(self, page, city, pollutant):
+        # a single upsert, so concurrent replicas never overwrite each other's counts
+        with self._connect() as con:
+            con.execute("""INSERT INTO views VALUES (?, ?, ?, 1.0, 1, ?)
+                ON CONFLICT (page, city, pollutant) DO UPDATE SET
+                    score = score * decay(max(excluded.updated - updated, 0)) + 1,
+                    hits = hits + 1,
+                    updated = excluded.updated""",
+                        (page, city, pollutant, time.time()))
+
+    def hot_views(self):
+        """All tracked views, most popular first, with their score decayed to now."""
+        now = time.time()
+        with self._connect() as con:
+            rows = con.execute("SELECT page, city, pollutant, score, hits, updated FROM views").fetchall()
+        views = [{'page': p, 'city': c, 'pollutant': pol, 'score': s * self._decay(now - u), 'hits': h}
+                 for p, c, pol, s, h, u in rows]
+        return sorted(views, key=lambda v: v['score'], reverse=True)
+
+
+_TRACKER = None
+
+
+def record_access(page, city, pollutant, session=None):
+    """
+    Count a page view; never lets a tracking problem break the page. Pass
+    ``st.session_state`` as ``session`` so Streamlit reruns triggered by
+    widgets on the same view are not counted again.
+    """
+    global _TRACKER
+    view = (page, city, pollutant)
+    if session is not None:
+        if session.get('last_recorded_view') == view:
+            return
+        session['last_recorded_view'] = view
+    try:
+        if _TRACKER is None:
+            _TRACKER = UsageTracker()
+        _TRACKER.record(page, city, pollutant)
+    except sqlite3.Error:
+        pass
+
+
+# -------------------------------------------------------------
+# PRECOMPUTE TASKS
+# -------------------------------------------------------------
+def warm_shared(version):
+    """Loads and aggregates every view depends on, at data version ``version``."""
+    import milestone3_dashboard as m3
+    import milestone4_dashboard as m4
+
+    m3.load_data(version=version)
+    m3.load_sensor_flags(version=version)
+    m3.load_fast_forecast(periods=7, version=version)
+    return m4.load_station_data(version=version)
+
+
+def warm_view(view, station_df, version):
+    import milestone3_dashboard as m3
+    import milestone4_dashboard as m4
+
+    if view['page'] == "Milestone 3":
+        m3.city_prophet_forecast(view['city'], periods=7, version=version)
+    elif view['page'] == "Milestone 4":
+        for steps in m4.HORIZON_DAYS.values():
+            m4.station_forecast(station_df, view['city'], view['pollutant'], steps, "ARIMA", version)
+            m4.station_forecast(station_df, view['city'], view['pollutant'], steps, "Holt-Winters", version)
+
+
+# -------------------------------------------------------------
+# SCHEDULER
+# -------------------------------------------------------------
+class PrecomputeScheduler:
+    """
+    Background refresher: after each data version bump, re-run the shared
+    loads and then each tracked view's forecasts, most popular first,
+    until ``cpu_budget`` CPU-seconds are spent. ``duty_cycle`` caps the
+    share of one core it uses so serving threads stay responsive. Views
+    left over when the budget runs out are computed lazily on first access.
+    Only one replica refreshes at a time; the rest read its results from
+    the shared artifact store.
+    """
+
+    def __init__(self, data_path=DATA_PATH, cpu_budget=CPU_BUDGET, duty_cycle=DUTY_CYCLE,
+                 poll_interval=POLL_INTERVAL, store=None, tracker=None):
+        self.data_path = data_path
+        self.cpu_budget = cpu_budget
+        self.duty_cycle = min(max(duty_cycle, 0.05), 1.0)
+        self.poll_interval = poll_interval
+        self.store = store or get_store()
+        self.tracker = tracker or UsageTracker(os.path.join(self.store.root, USAGE_DB))
+        self.status_path = os.path.join(self.store.root, STATUS_FILE)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _pace(self, cpu_seconds):
+        if self.duty_cycle < 1.0:
+            self._stop.wait(cpu_seconds * (1 / self.duty_cycle - 1))
+
+    def _write_status(self, status):
+        fd, tmp = tempfile.mkstemp(dir=self.store.root, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(status, f, indent=2)
+        os.replace(tmp, self.status_path)
+
+    def run_once(self, force=False):
+        """Refresh if the data version changed. Returns the new status, or None if nothing ran."""
+        version = file_version(self.data_path)
+        previous = read_status(self.status_path)
+        if not force and previous.get('data_version') == version and previous.get('finished_at'):
+            return None
+
+        with _file_lock(os.path.join(self.store.locks, "scheduler.lock"), blocking=False) as leader:
+            if not leader:
+                return None          # another replica is already refreshing
+            detected_at = (previous['detected_at'] if previous.get('data_version') == version
+                           and previous.get('detected_at') else time.time())
+            status = {'data_version': version, 'detected_at': detected_at, 'finished_at': None,
+                      'cpu_seconds': 0.0, 'cpu_budget': self.cpu_budget, 'views': []}
+            self._write_status(status)
+
+            cpu_start = time.thread_time()
+            station_df = warm_shared(version)
+            self._pace(time.thread_time() - cpu_start)
+
+            for view in self.tracker.hot_views():
+                if self._stop.is_set():
+                    break
+                spent = time.thread_time() - cpu_start
+                entry = dict(view, state='deferred', refreshed_at=None, lag_seconds=None)
+                if spent < self.cpu_budget:
+                    t0 = time.thread_time()
+                    try:
+                        warm_view(view, station_df, version)
+                        entry.update(state='warm', refreshed_at=time.time())
+                        entry['lag_seconds'] = round(entry['refreshed_at'] - detected_at, 2)
+                    except Exception as e:
+                        entry.update(state='failed', error=str(e))
+                    self._pace(time.thread_time() - t0)
+                status['views'].append(entry)
+                status['cpu_seconds'] = round(time.thread_time() - cpu_start, 2)
+                self._write_status(status)
+
+            status['finished_at'] = time.time()
+            self._write_status(status)
+            return status
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                pass             # a failed cycle is retried on the next poll
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="precompute-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+# -------------------------------------------------------------
+# FRESHNESS / LAG METRICS
+# -------------------------------------------------------------
+def read_status(path=None):
+    path = path or os.path.join(get_store().root, STATUS_FILE)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def scheduler_status(data_path=DATA_PATH):
+    """Freshness and lag summary of the last refresh, for dashboards and monitoring."""
+    status = read_status()
+    views = status.get('views', [])
+    lags = sorted(v['lag_seconds'] for v in views if v.get('lag_seconds') is not None)
+    warm = sum(v['state'] == 'warm' for v in views)
+    current = file_version(data_path)
+
+    def stamp(ts):
+        return datetime.fromtimestamp(ts).isoformat(timespec='seconds') if ts else None
+
+    return {
+        'data_version': status.get('data_version'),
+        'up_to_date': status.get('data_version') == current and bool(status.get('finished_at')),
+        'detected_at': stamp(status.get('detected_at')),
+        'finished_at': stamp(status.get('finished_at')),
+        'cpu_seconds': status.get('cpu_seconds', 0.0),
+        'views_tracked': len(views),
+        'views_warm': warm,
+        'freshness': round(warm / len(views), 3) if views else None,
+        'lag_p50_seconds': lags[len(lags) // 2] if lags else None,
+        'lag_max_seconds': lags[-1] if lags else None,
+        'views': views,
+    }
+
+
+def start_background_scheduler(**kwargs):
+    """Start the refresher thread unless disabled with AIRAWARE_PRECOMPUTE=0."""
+    if os.environ.get("AIRAWARE_PRECOMPUTE", "1") == "0":
+        return None
+    return PrecomputeScheduler(**kwargs).start()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Usage-aware precompute scheduler for AirAware dashboards.")
+    parser.add_argument("--once", action="store_true", help="Run a single refresh and exit")
+    parser.add_argument("--force", action="store_true", help="Refresh even if the data version is unchanged")
+    parser.add_argument("--budget", type=float, default=CPU_BUDGET, help="CPU-seconds per refresh")
+    parser.add_argument("--duty", type=float, default=DUTY_CYCLE, help="Max share of one core to use")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL)
+    parser.add_argument("--status", action="store_true", help="Print freshness metrics and exit")
+    args = parser.parse_args()
+
+    if args.status:
+        summary = scheduler_status()
+        summary.pop('views')
+        print(json.dumps(summary, indent=2))
+    else:
+        scheduler = PrecomputeScheduler(cpu_budget=args.budget, duty_cycle=args.duty, poll_interval=args.interval)
+        if args.once:
+            scheduler.run_once(force=args.force)
+        else:
+            scheduler.start()._thread.join()
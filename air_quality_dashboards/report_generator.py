@@ -0,0 +1,274 @@
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+from statsmodels.tsa.arima.model import ARIMA
+
+from data_version import city_fingerprints
+from gap_filling import city_series
+from milestone3_dashboard import AQI_COLOR, WHO_LIMITS, get_aqi_category, load_data
+
+# -------------------------------------------------------------
+# CONSTANTS
+# -------------------------------------------------------------
+SUMMARY_COLUMNS = ['PM2.5', 'PM10', 'NO2', 'SO2', 'CO', 'O3', 'NH3', 'AQI']
+MANIFEST_NAME = "manifest.json"
+FORECAST_DAYS = 7
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>AirAware Report - {city}</title>
+<style>
+  body {{font-family: 'Poppins', sans-serif; margin: 30px; color: #333;}}
+  h1 {{color: #0d47a1;}}
+  h2 {{color: #00838f; margin-top: 30px;}}
+  table {{border-collapse: collapse; margin-top: 8px;}}
+  th, td {{border: 1px solid #ddd; padding: 6px 10px; text-align: right;}}
+  th {{background: #e0f7fa;}}
+</style>
+</head>
+<body>
+<h1>🌫️ {city} – Air Quality Report</h1>
+<p>Data span: {start} to {end} ({rows} days) · Generated {generated}</p>
+<h2>📊 Summary Statistics</h2>
+{summary}
+<h2>⚠️ WHO Limit Exceedances</h2>
+{exceedances}
+<h2>🎨 AQI Category Distribution</h2>
+{categories}
+<h2>🔮 {horizon}-Day AQI Forecast (ARIMA, 95% CI)</h2>
+{forecast}
+</body>
+</html>
+"""
+
+
+def city_slug(city):
+    return re.sub(r'[^A-Za-z0-9]+', '_', city).strip('_').lower()
+
+
+# -------------------------------------------------------------
+# REPORT SECTIONS
+# -------------------------------------------------------------
+def summary_statistics(df_city):
+    cols = [c for c in SUMMARY_COLUMNS if c in df_city.columns]
+    return df_city[cols].describe().T.round(2)
+
+
+def exceedance_counts(df_city):
+    rows = []
+    for p, lim in WHO_LIMITS.items():
+        if p not in df_city.columns:
+            continue
+        values = df_city[p].dropna()
+        exceed = values > lim
+        rows.append({
+            'Pollutant': p,
+            'WHO Limit': lim,
+            'Days Measured': len(values),
+            'Days Exceeded': int(exceed.sum()),
+            'Exceeded (%)': round(100 * exceed.mean(), 1) if len(values) else 0.0,
+            'Max': round(values.max(), 2) if len(values) else None
+        })
+    return pd.DataFrame(rows)
+
+
+def category_distribution(df_city):
+    cats = df_city['AQI'].dropna().apply(get_aqi_category)
+    counts = cats.value_counts().reindex(list(AQI_COLOR), fill_value=0)
+    dist = counts.rename('Days').to_frame()
+    dist['Share (%)'] = (100 * dist['Days'] / max(len(cats), 1)).round(1)
+    dist.index.name = 'Category'
+    return dist.reset_index()
+
+
+def forecast_with_ci(df_city, periods=FORECAST_DAYS):
+    series, _ = city_series(df_city, df_city['City'].iloc[0], 'AQI')
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            model_fit = ARIMA(series, order=(2, 1, 2)).fit()
+        except Exception:
+            model_fit = ARIMA(series, order=(1, 1, 1)).fit()
+        forecast = model_fit.get_forecast(steps=periods)
+    ci = forecast.conf_int()
+    fcst = pd.DataFrame({
+        'AQI': forecast.predicted_mean.values,
+        'Lower CI': ci.iloc[:, 0].values,
+        'Upper CI': ci.iloc[:, 1].values
+    }, index=pd.Index(forecast.predicted_mean.index, name='Date')).round(2)
+    fcst['Category'] = fcst['AQI'].apply(get_aqi_category)
+    return fcst.reset_index()
+
+
+# -------------------------------------------------------------
+# PER-CITY WORKER
+# -------------------------------------------------------------
+def _write_table(df, path_stem, fmt):
+    if fmt == 'parquet':
+        path = f"{path_stem}.parquet"
+        df.to_parquet(path, index=False)
+    else:
+        path = f"{path_stem}.csv"
+        df.to_csv(path, index=False)
+    return path
+
+
+def build_city_report(city, df_city, out_dir, fmt='csv'):
+    """Write all report tables and the HTML page for one city; returns the file list."""
+    df_city = df_city.drop_duplicates('Date').sort_values('Date')
+    city_dir = os.path.join(out_dir, city_slug(city))
+    os.makedirs(city_dir, exist_ok=True)
+
+    summary = summary_statistics(df_city)
+    exceedances = exceedance_counts(df_city)
+    categories = category_distribution(df_city)
+    try:
+        forecast = forecast_with_ci(df_city)
+    except Exception as e:
+        forecast = pd.DataFrame({'Error': [f"Forecast failed: {e}"]})
+
+    files = [
+        _write_table(summary.reset_index().rename(columns={'index': 'Pollutant'}),
+                     os.path.join(city_dir, "summary"), fmt),
+        _write_table(exceedances, os.path.join(city_dir, "exceedances"), fmt),
+        _write_table(categories, os.path.join(city_dir, "categories"), fmt),
+        _write_table(forecast, os.path.join(city_dir, "forecast"), fmt),
+    ]
+
+    html = HTML_TEMPLATE.format(
+        city=city,
+        start=df_city['Date'].min().date(),
+        end=df_city['Date'].max().date(),
+        rows=len(df_city),
+        generated=datetime.now().strftime("%Y-%m-%d %H:%M"),
+        summary=summary.to_html(),
+        exceedances=exceedances.to_html(index=False),
+        categories=categories.to_html(index=False),
+        horizon=FORECAST_DAYS,
+        forecast=forecast.to_html(index=False)
+    )
+    html_path = os.path.join(city_dir, "report.html")
+    with open(html_path, "w", encoding="utf-8") as f:
+        f.write(html)
+    files.append(html_path)
+    return files
+
+
+def _run_city(task):
+    city, df_city, out_dir, fmt = task
+    return city, build_city_report(city, df_city, out_dir, fmt)
+
+
+# -------------------------------------------------------------
+# MANIFEST (INCREMENTAL STATE)
+# -------------------------------------------------------------
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def stale_cities(df, manifest, fmt='csv'):
+    """Cities whose data fingerprint changed, or whose outputs are missing."""
+    stale = {}
+    for city, fp in city_fingerprints(df).items():
+        entry = manifest.get(city)
+        if (entry is None or entry.get('fingerprint') != fp or entry.get('format') != fmt
+                or not all(os.path.exists(p) for p in entry.get('files', []))):
+            stale[city] = fp
+    return stale
+
+
+def write_index(out_dir, manifest):
+    rows = "\n".join(
+        f"<li><a href='{city_slug(city)}/report.html'>{city}</a> "
+        f"<small>(updated {entry['generated_at']})</small></li>"
+        for city, entry in sorted(manifest.items())
+    )
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE html><html><head><meta charset='utf-8'>"
+                "<title>AirAware Admin Reports</title></head><body>"
+                f"<h1>🌫️ AirAware Admin Reports</h1><ul>\n{rows}\n</ul></body></html>")
+
+
+# -------------------------------------------------------------
+# ENTRY POINT
+# -------------------------------------------------------------
+def generate_reports(df=None, out_dir="reports", fmt='csv', workers=None, force=False):
+    """
+    Generate per-city admin reports for every station in parallel.
+
+    Only cities whose data changed since the last run are rebuilt. Each
+    worker writes its files straight to disk and the manifest is updated
+    as soon as a city finishes, so an interrupted run keeps its progress.
+    Returns the list of cities that were regenerated.
+    """
+    if fmt not in ('csv', 'parquet'):
+        raise ValueError(f"Unsupported report format: {fmt}")
+    if df is None:
+        df = load_data()
+    os.makedirs(out_dir, exist_ok=True)
+
+    previous = load_manifest(out_dir)
+    manifest = {} if force else previous
+    manifest = {c: e for c, e in manifest.items() if c in set(df['City'].unique())}
+    stale = stale_cities(df, manifest, fmt)
+
+    # drop the outputs being replaced, so a format switch leaves no old copies behind
+    for city in stale:
+        for path in previous.get(city, {}).get('files', []):
+            if os.path.exists(path):
+                os.remove(path)
+
+    if stale:
+        groups = dict(tuple(df[df['City'].isin(stale)].groupby('City')))
+        tasks = ((city, groups[city], out_dir, fmt) for city in stale)
+        # spawn, not fork: the dashboard process runs server and scheduler
+        # threads holding locks that a forked child would inherit
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(_run_city, task) for task in tasks]
+            for future in as_completed(futures):
+                city, files = future.result()
+                manifest[city] = {
+                    'fingerprint': stale[city],
+                    'format': fmt,
+                    'files': files,
+                    'generated_at': datetime.now().isoformat(timespec='seconds')
+                }
+                save_manifest(out_dir, manifest)
+
+    save_manifest(out_dir, manifest)
+    write_index(out_dir, manifest)
+    return sorted(stale)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate AirAware admin reports for all stations.")
+    parser.add_argument("--data", default="data/air_quality.csv")
+    parser.add_argument("--out", default="reports")
+    parser.add_argument("--format", choices=['csv', 'parquet'], default='csv')
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="Regenerate every city")
+    args = parser.parse_args()
+
+    updated = generate_reports(load_data(args.data), args.out, args.format, args.workers, args.force)
+    print(f"Regenerated {len(updated)} city report(s): {', '.join(updated) or 'none'}")
@@ -0,0 +1,305 @@
+import argparse
+import itertools
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------------------
+# CONSTANTS
+# -------------------------------------------------------------
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "best_xgb_model.joblib")
+
+# column order the XGBoost model was trained with (milestone_2.ipynb)
+FEATURES = ['PM2.5', 'PM10', 'O3', 'NO2', 'SO2', 'CO']
+TRAIN_FRACTION = 0.8          # the notebook fit its StandardScaler on the first 80% of rows
+AQI_SCALE = 500               # model predicts normalized AQI (0–1)
+
+CATEGORIES = ['Good', 'Satisfactory', 'Moderate', 'Poor', 'Very Poor', 'Severe']
+CATEGORY_BOUNDS = [50, 100, 200, 300, 400]
+
+CHUNK_ROWS = 2_000_000        # (reading, scenario) pairs held in memory at once
+
+PROBE_ROWS = 512              # rows checked against model.predict when compiling
+PROBE_TOLERANCE = 1e-4        # max |compiled - xgboost| on normalized AQI
+
+
+# -------------------------------------------------------------
+# MODEL + INPUTS
+# -------------------------------------------------------------
+def load_model(path=MODEL_PATH):
+    return joblib.load(path)
+
+
+def load_inputs(path="data/air_quality.csv"):
+    """Raw (model-scale) pollutant readings plus the scaler the model was trained with."""
+    df = pd.read_csv(path)
+    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    train = df[FEATURES].iloc[:int(len(df) * TRAIN_FRACTION)]
+    scaler = (train.mean().to_numpy(), train.std(ddof=0).to_numpy())
+    return df.dropna(subset=FEATURES), scaler
+
+
+class CompiledForest:
+    """
+    The XGBoost tree ensemble as flat NumPy arrays, evaluated over a
+    cartesian grid of per-feature values without expanding the grid.
+
+    Each feature's candidate values are sorted, so a split ``x < threshold``
+    cuts a feature's levels into a prefix and a suffix. Walking a tree with
+    a *box* of level ranges instead of a single point therefore visits only
+    the few leaves a reading's scenarios can reach, and each reached leaf
+    adds its value to a sub-box of the result. Sub-boxes are accumulated
+    with a difference array and prefix sums, so the output matches
+    ``model.predict`` on the expanded matrix at a fraction of the cost.
+
+    Only single-output ``gbtree`` models with numeric splits are supported,
+    and the compiled forest is checked against ``model.predict`` on a probe
+    batch; a model it cannot reproduce raises ``ValueError``.
+    """
+
+    def __init__(self, model):
+        learner = json.loads(model.get_booster().save_raw('json'))['learner']
+        params = learner['learner_model_param']
+        booster = learner['gradient_booster']
+        if booster['name'] != 'gbtree' or int(params['num_target']) > 1 or int(params['num_class']) > 1:
+            raise ValueError("CompiledForest supports single-output gbtree models only.")
+        trees = booster['model']['trees']
+        if any(any(t['split_type']) for t in trees):
+            raise ValueError("CompiledForest does not support categorical splits.")
+        self.base_score = float(params['base_score'].strip('[]'))
+        self.n_features = int(params['num_feature'])
+
+        offsets = np.cumsum([0] + [len(t['left_children']) for t in trees[:-1]])
+        self.roots = offsets.astype(np.int64)
+
+        def stacked(key, dtype, is_child=False):
+            arrays = [np.asarray(t[key], dtype=dtype) for t in trees]
+            if is_child:
+                arrays = [np.where(a == -1, -1, a + off) for a, off in zip(arrays, offsets)]
+            return np.concatenate(arrays)
+
+        self.left = stacked('left_children', np.int64, is_child=True)
+        self.right = stacked('right_children', np.int64, is_child=True)
+        self.feature = stacked('split_indices', np.int64)
+        self.threshold = stacked('split_conditions', np.float32)    # leaf value at leaf nodes
+        self._verify(model)
+
+    def _verify(self, model):
+        """Compare with ``model.predict`` on random rows, some sitting exactly on split thresholds."""
+        rng = np.random.default_rng(0)
+        probe = (2 * rng.standard_normal((PROBE_ROWS, self.n_features))).astype(np.float32)
+        splits = np.flatnonzero(self.left != -1)
+        if len(splits):
+            pick = rng.choice(splits, PROBE_ROWS)
+            probe[np.arange(PROBE_ROWS), self.feature[pick]] = self.threshold[pick]
+        compiled = self.predict_grid([probe[:, [i]] for i in range(self.n_features)]).reshape(-1)
+        diff = np.abs(compiled - model.predict(probe)).max()
+        if not diff <= PROBE_TOLERANCE:
+            raise ValueError(f"Compiled forest disagrees with model.predict (max diff {diff:.2e}); "
+                             "the model uses features the compiler does not reproduce.")
+
+    def _reached_leaves(self, padded, shape):
+        """Breadth-first walk of every tree for every reading, carrying level boxes."""
+        n, n_feat = padded.shape[0], len(shape)
+        row = np.repeat(np.arange(n), len(self.roots))
+        node = np.tile(self.roots, n)
+        lo = np.zeros((len(row), n_feat), dtype=np.int64)
+        hi = np.tile(shape, (len(row), 1))
+
+        leaves = []
+        while len(row):
+            is_leaf = self.left[node] == -1
+            leaves.append((row[is_leaf], lo[is_leaf], hi[is_leaf], self.threshold[node[is_leaf]]))
+            row, node, lo, hi = row[~is_leaf], node[~is_leaf], lo[~is_leaf], hi[~is_leaf]
+
+            items = np.arange(len(row))
+            f = self.feature[node]
+            cut = (padded[row, f, :] < self.threshold[node][:, None]).sum(axis=1)
+            lo_f, hi_f = lo[items, f], hi[items, f]
+            go_left = lo_f < np.minimum(hi_f, cut)
+            go_right = np.maximum(lo_f, cut) < hi_f
+
+            left_hi = hi[go_left]
+            left_hi[np.arange(len(left_hi)), f[go_left]] = np.minimum(hi_f, cut)[go_left]
+            right_lo = lo[go_right]
+            right_lo[np.arange(len(right_lo)), f[go_right]] = np.maximum(lo_f, cut)[go_right]
+
+            row = np.concatenate([row[go_left], row[go_right]])
+            node = np.concatenate([self.left[node[go_left]], self.right[node[go_right]]])
+            lo = np.concatenate([lo[go_left], right_lo])
+            hi = np.concatenate([left_hi, hi[go_right]])
+
+        return (np.concatenate(parts) for parts in zip(*leaves))
+
+    def predict_grid(self, level_values):
+        """
+        ``level_values[i]`` is a (readings x L_i) array of candidate values
+        for feature i, non-decreasing along each row. Returns predictions
+        shaped (readings, L_1, ..., L_n).
+        """
+        n = level_values[0].shape[0]
+        shape = np.array([v.shape[1] for v in level_values], dtype=np.int64)
+        padded = np.full((n, len(shape), shape.max()), np.inf, dtype=np.float32)
+        for i, v in enumerate(level_values):
+            padded[:, i, :v.shape[1]] = v
+
+        row, lo, hi, value = self._reached_leaves(padded, shape)
+
+        # difference array: +v at a box's low corner and alternating signs at
+        # every bounded high edge; prefix sums along each axis rebuild the boxes
+        idx, val, src = row * int(np.prod(shape)), value.astype(np.float64), np.arange(len(row))
+        for i in range(len(shape)):
+            stride = int(np.prod(shape[i + 1:]))
+            lo_i, hi_i = lo[src, i], hi[src, i]
+            bounded = hi_i < shape[i]
+            idx = np.concatenate([idx + lo_i * stride, idx[bounded] + hi_i[bounded] * stride])
+            val = np.concatenate([val, -val[bounded]])
+            src = np.concatenate([src, src[bounded]])
+
+        out = np.bincount(idx, weights=val, minlength=n * int(np.prod(shape)))
+        out = out.reshape([n] + shape.tolist())
+        for axis in range(1, out.ndim):
+            np.cumsum(out, axis=axis, out=out)
+        return (out + self.base_score).astype(np.float32)
+
+
+def scenario_grid(adjustments):
+    """
+    Cartesian product of per-pollutant adjustments.
+
+    ``adjustments`` maps pollutant -> list of relative changes, e.g.
+    ``{'PM10': [-0.2, -0.1, 0]}``. Returns a frame of multipliers with one
+    row per scenario and one column per model feature.
+    """
+    unknown = set(adjustments) - set(FEATURES)
+    if unknown:
+        raise ValueError(f"Model has no feature(s): {', '.join(sorted(unknown))}")
+    # sorted, de-duplicated multipliers (the compiled forest relies on the ordering)
+    levels = [np.unique(np.clip(np.asarray(adjustments.get(p, [0.0]), dtype=float) + 1.0, 0, None))
+              for p in FEATURES]
+    grid = np.array(list(itertools.product(*levels)))
+    return pd.DataFrame(grid, columns=FEATURES).rename_axis('Scenario'), levels
+
+
+def aqi_category_codes(aqi):
+    """Vectorized CPCB category index (0 = Good ... 5 = Severe)."""
+    return np.searchsorted(CATEGORY_BOUNDS, aqi, side='left')
+
+
+# -------------------------------------------------------------
+# SIMULATION
+# -------------------------------------------------------------
+def simulate(df, scaler, adjustments, cities=None, start=None, end=None,
+             model=None, forest=None, chunk_rows=CHUNK_ROWS):
+    """
+    Score every scenario in the adjustment grid for the chosen cities/dates.
+
+    Readings are processed in blocks sized so that at most ``chunk_rows``
+    (reading, scenario) pairs are held at once; each block yields the whole
+    (readings x scenarios) AQI matrix in one batched call. Results are
+    aggregated per (scenario, city): mean AQI, change against the model's
+    prediction for the unadjusted readings, share of days in each category
+    and the share of days that move to a better or worse category than
+    that prediction.
+    """
+    forest = forest or CompiledForest(model or load_model())
+    sel = df
+    if cities:
+        sel = sel[sel['City'].isin(cities)]
+    if start is not None:
+        sel = sel[sel['Date'] >= pd.to_datetime(start)]
+    if end is not None:
+        sel = sel[sel['Date'] <= pd.to_datetime(end)]
+    if sel.empty:
+        raise ValueError("No readings for the selected cities and dates.")
+
+    grid, levels = scenario_grid(adjustments)
+    base = np.maximum(sel[FEATURES].to_numpy(dtype=np.float32), 0)   # negatives are sensor faults
+    mean, std = (np.asarray(a, dtype=np.float32) for a in scaler)
+    city_codes, city_names = pd.factorize(sel['City'], sort=True)
+    onehot = np.eye(len(city_names), dtype=np.float32)[city_codes]          # readings x cities
+
+    n_stats = 4 + len(CATEGORIES)
+    totals = np.zeros((n_stats, len(grid), len(city_names)))
+    per_chunk = max(1, chunk_rows // len(grid))
+    for lo in range(0, len(base), per_chunk):
+        x = base[lo:lo + per_chunk]
+        oh = onehot[lo:lo + per_chunk]
+        z_levels = [((x[:, [i]] * lv[None, :].astype(np.float32)) - mean[i]) / std[i]
+                    for i, lv in enumerate(levels)]
+        z_base = [((x[:, [i]]) - mean[i]) / std[i] for i in range(len(FEATURES))]
+
+        aqi = forest.predict_grid(z_levels).reshape(len(x), -1).T * AQI_SCALE     # scenarios x readings
+        baseline = forest.predict_grid(z_base).reshape(-1) * AQI_SCALE
+        cat = aqi_category_codes(aqi)
+        shift = cat - aqi_category_codes(baseline)[None, :]
+
+        totals[0] += aqi @ oh
+        totals[1] += (aqi - baseline[None, :]) @ oh
+        totals[2] += (shift < 0) @ oh
+        totals[3] += (shift > 0) @ oh
+        for code in range(len(CATEGORIES)):
+            totals[4 + code] += (cat == code) @ oh
+
+    totals /= onehot.sum(axis=0)[None, None, :]
+    totals[2:] *= 100
+    columns = ['AQI', 'AQI Change', 'Improved (%)', 'Worsened (%)'] + [f'{c} (%)' for c in CATEGORIES]
+    index = pd.MultiIndex.from_product([grid.index, city_names], names=['Scenario', 'City'])
+    out = pd.DataFrame(totals.reshape(n_stats, -1).T, index=index, columns=columns)
+
+    changes = (grid - 1.0).mul(100).add_suffix(' change (%)')
+    return changes.join(out, how='inner').round(2)
+
+
+def best_scenarios(results, n=10):
+    """Scenarios with the largest average AQI reduction across the selected cities."""
+    summary = results.groupby(level='Scenario').mean(numeric_only=True)
+    return summary.nsmallest(n, 'AQI Change')
+
+
+# -------------------------------------------------------------
+# BENCHMARK
+# -------------------------------------------------------------
+def benchmark(path="data/air_quality.csv"):
+    """Score 4,096 scenarios (4 levels x 6 pollutants) over the last year of data."""
+    df, scaler = load_inputs(path)
+    model = load_model()
+    t0 = time.perf_counter()
+    forest = CompiledForest(model)
+    print(f"Model compiled in {time.perf_counter() - t0:.2f}s "
+          f"({len(forest.roots)} trees, {len(forest.left)} nodes)")
+
+    adjustments = {p: [-0.3, -0.2, -0.1, 0.0] for p in FEATURES}
+    end = df['Date'].max()
+    start = end - pd.Timedelta(days=365)
+    n_scen = 4 ** len(FEATURES)
+
+    for label, cities in [("Delhi", ["Delhi"]), ("All cities", None)]:
+        year = df[(df['Date'] >= start) & (df['City'].isin(cities) if cities else True)]
+        t0 = time.perf_counter()
+        res = simulate(df, scaler, adjustments, cities=cities, start=start, end=end, forest=forest)
+        secs = time.perf_counter() - t0
+        scored = len(year) * n_scen
+        print(f"{label:<11}: {n_scen:,} scenarios x {len(year):,} readings = "
+              f"{scored:,} predictions in {secs:.2f}s ({scored / secs:,.0f}/s)")
+
+    # exactness check against XGBoost on a random sample of expanded rows
+    grid, _ = scenario_grid(adjustments)
+    rng = np.random.default_rng(0)
+    rows = year.sample(200, random_state=0)[FEATURES].to_numpy(dtype=np.float32)
+    mult = grid.to_numpy(dtype=np.float32)[rng.integers(0, len(grid), 200)]
+    X = (rows * mult - scaler[0].astype(np.float32)) / scaler[1].astype(np.float32)
+    compiled = forest.predict_grid([X[:, [i]] for i in range(len(FEATURES))]).reshape(-1)
+    print(f"Max |compiled - xgboost| on 200 samples: {np.abs(compiled - model.predict(X)).max():.2e}")
+    print(best_scenarios(res, 3).iloc[:, :8])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="What-if emission scenario simulator benchmark.")
+    parser.add_argument("--data", default="data/air_quality.csv")
+    args = parser.parse_args()
+    benchmark(args.data)